@@ -185,6 +185,22 @@ class SDBAdditional:
 
 
 
+    # blocking file io, run in a worker thread by __load_cache / __write_cache
+    # so concurrent loads gathered in __cached_lists don't stall the event loop
+    def __read_cache_df(self, path: str) -> pd.DataFrame:
+        return pd.read_json(path, lines=True).replace({np.nan: None})
+
+    def __read_cache_lines(self, path: str, cached: list) -> None:
+        with open(path, 'r') as f:
+            for line in f:
+                cached.append(json.loads(line))
+
+    def __dump_cache_lines(self, path: str, payload: list[dict]) -> None:
+        with open(path, 'w') as f:
+            for p in payload:
+                f.write(json.dumps(p))
+                f.write('\n')
+
     async def __load_cache(self, list_name: SdbLists, env=None, silent=False, df=False):
         if df:
             cached = pd.DataFrame()
@@ -223,19 +239,21 @@ class SDBAdditional:
         if df:
             try:
             # for i in 'a':
-                cached_df = pd.read_json(
-                    f"{'/'.join(file_path)}",
-                    lines=True
-                ).replace({np.nan: None})
+                cached_df = await asyncio.to_thread(
+                    self.__read_cache_df,
+                    '/'.join(file_path)
+                )
                 return cached_df
             except Exception as e:
                 self.logger.warning(f"{e.__class__.__name__}: {list_name.value} cache is not loaded")
                 return pd.DataFrame()
         else:
             try:
-                with open(f"{'/'.join(file_path)}", 'r') as f:
-                    for line in f:
-                        cached.append(json.loads(line))
+                await asyncio.to_thread(
+                    self.__read_cache_lines,
+                    '/'.join(file_path),
+                    cached
+                )
                 return cached
             except json.decoder.JSONDecodeError:
                 if not silent:
@@ -258,12 +276,18 @@ class SDBAdditional:
         self.__check_file_path(file_path)
         try:
             if isinstance(payload, list):
-                with open(f"{'/'.join(file_path)}", 'w') as f:
-                    for p in payload:
-                        f.write(json.dumps(p))
-                        f.write('\n')
+                await asyncio.to_thread(
+                    self.__dump_cache_lines,
+                    '/'.join(file_path),
+                    payload
+                )
             elif isinstance(payload, pd.DataFrame):
-                payload.to_json('/'.join(file_path), 'records', lines=True)
+                await asyncio.to_thread(
+                    payload.to_json,
+                    '/'.join(file_path),
+                    'records',
+                    lines=True
+                )
         except Exception as e:
             self.logger.warning(f"{e.__class__.__name__}: {list_name.value} cache is not updated")
 
@@ -14,12 +14,12 @@ import json
 import logging
 import re
 import os
-import uuid
 import time
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 from copy import deepcopy
 
 from libs.authdb import get_session, keyload, NotAuthorized
+from libs.easy_func import is_uuid as _is_uuid
 
 
 class SymbolDBError(Exception):
@@ -326,11 +326,7 @@ class SymbolDB:
         :param string: input string
         :return: True if string is uuid
         """
-        try:
-            u = uuid.UUID(string)
-            return True
-        except (ValueError, TypeError):
-            return False
+        return _is_uuid(string)
 
     def strip_id(self, data: dict) -> dict:
         """
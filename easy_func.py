@@ -1,4 +1,13 @@
 import asyncio
+import re
+import uuid
+
+
+# canonical, hyphenless, braced and urn forms of uuid, pre-filter for is_uuid
+_UUID_RE = re.compile(
+    r'(?:urn:)?(?:uuid:)?\{?[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+    r'[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}\}?'
+)
 
 
 def chunk_list(_list: list, n: int) -> list:
@@ -63,4 +72,23 @@ def recursive_items(dictionary):
             yield from recursive_items(value)
         else:
             yield (key, value)
-            
\ No newline at end of file
+            
+
+
+def is_uuid(string) -> bool:
+    """ Checks whether or not string is uuid. Regex rejects most of non-ids
+    without raising, uuid.UUID has the final word
+
+    Args:
+        string: input string
+
+    Returns:
+        bool: True if string is uuid
+    """
+    if not isinstance(string, str) or _UUID_RE.fullmatch(string) is None:
+        return False
+    try:
+        uuid.UUID(string)
+        return True
+    except ValueError:
+        return False
@@ -6,12 +6,13 @@ import logging
 import re
 import os
 import requests
-import uuid
 import time
 from retrying import retry
 from copy import deepcopy
 
 from libs.authdb import get_session, keyload, NotAuthorized
+from libs.easy_func import is_uuid as _is_uuid
+
 
 def conerror(exc):
     exception = [
@@ -629,11 +630,7 @@ class SymbolDB:
         :param string: input string
         :return: True if string is uuid
         """
-        try:
-            u = uuid.UUID(string)
-            return True
-        except (ValueError, TypeError):
-            return False
+        return _is_uuid(string)
 
     def strip_id(self, data: dict) -> dict:
         """
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3.7
 
+import functools
 import logging
 import numpy
 import pytz
@@ -7,23 +8,49 @@ import re
 import requests
 
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from time import monotonic
 from datetime import datetime, date, time, timezone, timedelta
 from dateutil import parser
 from decimal import Decimal
-from itertools import islice
+from operator import attrgetter, itemgetter
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 from typing import Dict, List, Set, Union
-from urllib.parse import quote as urlencode
+from urllib.parse import quote as urlencode, urlencode as urlencode_form
 import json
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = prange = None
+
 """
 Helpers
 """
 
 
+# shared pooled session for calls made outside of TickDB3 instance
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=128,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+
+# read size of streamed ndjson responses
+_STREAM_CHUNK = 256 * 1024
+
+
 class CommitLockedError(Exception):
     pass
 
@@ -33,6 +60,14 @@ class DecodeError(Exception):
 
 regex = {
     'decimal': re.compile(r'^\d+(\.\d+)$'),
+    # node url: http://tickdb_server@tickdb70.prod.zorg.sh:8181
+    'node': re.compile(
+        r'(?:http://)(?P<type>\w+)@(?P<node>\w+)\.(?P<env>\w+)\.(?P<domain>.\w+.\w+):(?P<port>\d+)'
+    ),
+    # timestamps as tickdb sends them: ISO with any fraction and offset format
+    'ts': re.compile(
+        r'^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?(Z|[+-]\d{2}:?\d{2})?$'
+    ),
     'dt': [
         # ISO and 2022.12.31 with time? and timezone?
         re.compile(
@@ -49,81 +84,501 @@ regex = {
     ]
 }
 
+def _parse_dt_string(value: str):
+    """
+    parses string in one of regex['dt'] formats
+    :return: datetime or None if string is not a date
+    """
+    for pattern in regex['dt']:
+        match = pattern.match(value)
+        if match:
+            break
+    else:
+        return None
+    try:
+        year = int(match.group('year'))
+        if year < 100:
+            year += 2000
+        result = datetime.combine(
+            date(year, int(match.group('month')), int(match.group('day'))),
+            time.fromisoformat(match.group('time')) if match.group('time') else time(0, 0)
+        )
+    except ValueError:
+        logging.error('Datetime conversion has failed')
+        return None
+    tz = match.groupdict().get('tz')
+    if not tz or tz in ('Z', '+0000', '-0000'):
+        return result.replace(tzinfo=timezone.utc)
+    offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[-2:]))
+    return result.replace(tzinfo=timezone(offset if tz[0] == '+' else -offset))
+
+
 def json_decoder(obj: dict):
+    """
+    object_hook for stdlib json, converts every numeric or datetime
+    string it meets (see also _decode_tree)
+    """
     for key, value in obj.items():
-        if isinstance(value, str):
-            if re.match(regex['decimal'], value):
-                value = Decimal(value)
+        # numbers and dates are the only strings converted,
+        # all of them start with a digit
+        if type(value) is str and value and '0' <= value[0] <= '9':
+            if regex['decimal'].match(value):
+                obj[key] = Decimal(value)
             else:
-                match = next((re.match(x) for x in regex['dt'] if re.match(x)), None)
-                if match:
-                    try:
-                        val_date = date(
-                            int(match.group('year')),
-                            int(match.group('month')),
-                            int(match.group('day'))
-                        )
-                        if match.group('time'):
-                            val_time = time.fromisoformat(match.group('time'))
-                        else:
-                            val_time = time(0,0)
-                        value = datetime.combine(val_date, val_time)
-                        if not match.group('tz') or match.group('tz') in ['Z', '+0000', '-0000']:
-                            value = value.replace(tzinfo=timezone.utc)
-                        else:
-                            hours = match.group('tz')[1:3]
-                            mins = match.group('tz')[3:]
-                            direction = match.group('tz')[0]
-                            value.replace(tzinfo=timezone(
-                                timedelta(hours=hours, minutes=mins) if direction == '+' else -timedelta(hours=hours, minutes=mins)
-                            ))
-                    except ValueError:
-                        logging.error('Datetime conversion has failed')
-                        pass
-        obj[key] = value
+                parsed = _parse_dt_string(value)
+                if parsed is not None:
+                    obj[key] = parsed
     return obj
 
 
-def key_generator(item, interval='1day'):
-    if interval == '1min':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, hour=item.timestamp.hour,
-                        minute=item.timestamp.minute, tzinfo=timezone.utc)
-
-    if interval == '5min':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, hour=item.timestamp.hour,
-                        minute=(item.timestamp.minute - item.timestamp.minute % 5),
-                        tzinfo=timezone.utc)
-    if interval == '15min':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, hour=item.timestamp.hour,
-                        minute=(item.timestamp.minute - item.timestamp.minute % 15),
-                        tzinfo=timezone.utc)
-    if interval == '30min':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, hour=item.timestamp.hour,
-                        minute=(item.timestamp.minute - item.timestamp.minute % 30),
-                        tzinfo=timezone.utc)
-    if interval == '1hour':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, hour=item.timestamp.hour, tzinfo=timezone.utc)
-    if interval == '1day':
-        return datetime(year=item.timestamp.year, month=item.timestamp.month,
-                        day=item.timestamp.day, tzinfo=timezone.utc)
+def _parse_ts(value: str) -> datetime:
+    """
+    parses timestamp string, ISO 8601 goes through datetime.fromisoformat,
+    anything else through dateutil
+    """
+    if value is None:
+        raise ValueError('Timestamp is required')
+    return _parse_iso(value) or parser.parse(value)
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_iso(value: str):
+    """
+    cached ISO 8601 part of _parse_ts: ticks often share timestamps.
+    dateutil results are not cached, they depend on the current date
+    :return: datetime or None if value is not ISO 8601
+    """
+    # week dates are rejected by dateutil, keep it that way
+    if 'W' not in value:
+        try:
+            if value.endswith('Z'):
+                return datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return _parse_iso_ts(value)
+
+
+def _parse_iso_ts(value: str):
+    """
+    builds datetime from regex groups, covers ISO variants that older
+    datetime.fromisoformat rejects (1-9 digit fractions, +0000 offsets)
+    :return: datetime, naive if there is no offset, or None if not matched
+    """
+    match = regex['ts'].match(value)
+    if match is None:
+        return None
+    fraction, tz = match.group(7), match.group(8)
+    if not tz:
+        tzinfo = None
+    elif tz == 'Z':
+        tzinfo = timezone.utc
     else:
+        offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[-2:]))
+        tzinfo = timezone(offset if tz[0] == '+' else -offset)
+    try:
+        return datetime(
+            *map(int, match.group(1, 2, 3, 4, 5, 6)),
+            int(fraction[:6].ljust(6, '0')) if fraction else 0,
+            tzinfo=tzinfo
+        )
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _float_to_decimal(value: float) -> Decimal:
+    """
+    float goes through its short repr. Cached: tick prices repeat a lot
+    """
+    return Decimal(repr(value))
+
+
+def _to_decimal(value) -> Decimal:
+    """
+    converts value to Decimal, goes through str only for non-integer numbers
+    so floats keep their short representation
+    """
+    if isinstance(value, Decimal):
+        return value
+    if type(value) is int:
+        return Decimal(value)
+    if type(value) is float:
+        return _float_to_decimal(value)
+    return Decimal(str(value))
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+_ONE_MS = timedelta(milliseconds=1)
+# Length of intervals in nanoseconds
+_INTERVAL_NS = {
+    '1min': 60 * 10**9,
+    '5min': 300 * 10**9,
+    '15min': 900 * 10**9,
+    '30min': 1800 * 10**9,
+    '1hour': 3600 * 10**9,
+    '1day': 86400 * 10**9
+}
+
+
+def _dt_to_ns(timestamp: datetime) -> int:
+    """
+    nanoseconds since epoch for wall clock of timestamp taken as UTC,
+    same convention as key_generator uses
+    """
+    return (timestamp.replace(tzinfo=None) - _EPOCH) // _ONE_US * 1000
+
+
+def _ns_to_dt(ns: int) -> datetime:
+    return _EPOCH_UTC + timedelta(microseconds=int(ns) // 1000)
+
+
+def _interval_ns(interval: str) -> int:
+    try:
+        return _INTERVAL_NS[interval]
+    except KeyError:
+        raise ValueError('Invalid interval')
+
+
+def _make_keygen(delta: int):
+    """
+    returns key generator specialized for interval of delta ns
+    """
+    def keygen(item):
+        ts_ns = getattr(item, '_ts_ns', None)
+        if ts_ns is None:
+            if item.timestamp is None:
+                raise ValueError(f'{type(item).__name__} has no timestamp')
+            ts_ns = _dt_to_ns(item.timestamp)
+        return _ns_to_dt(ts_ns - ts_ns % delta)
+    return keygen
+
+
+_KEYGEN = {interval: _make_keygen(delta) for interval, delta in _INTERVAL_NS.items()}
+
+
+def key_generator(item, interval='1day'):
+    """
+    returns beginning of interval (aware UTC datetime) that item belongs to
+    """
+    try:
+        keygen = _KEYGEN[interval]
+    except KeyError:
         raise ValueError('Invalid interval')
+    return keygen(item)
+
+
+def _sort_order(ts_ns, assume_sorted: bool = False):
+    """
+    :return: slice if timestamps are already sorted, stable argsort otherwise
+    """
+    if assume_sorted or (ts_ns[1:] >= ts_ns[:-1]).all():
+        return slice(None)
+    return numpy.argsort(ts_ns, kind='stable')
+
+
+def _bucket_edges(ts_ns, delta: int, assume_sorted: bool = False):
+    """
+    stable sorts ns timestamps and splits them into intervals of delta ns
+    :param assume_sorted: timestamps are known to be sorted, skip the check
+    :return: sorting order (slice if already sorted), bucket number of every
+     sorted item, indexes of the first and of the last item of every bucket
+    """
+    order = _sort_order(ts_ns, assume_sorted)
+    buckets = ts_ns[order] // delta
+    starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(buckets)) + 1))
+    ends = numpy.append(starts[1:], len(buckets)) - 1
+    return order, buckets, starts, ends
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _bucketize_ohlc(ts_ns, price, delta):
+        """
+        single pass OHLC over ticks sorted by ts_ns
+        :return: bucket numbers, bucket start indexes, open, high, low, close
+        """
+        n = ts_ns.shape[0]
+        count = 1
+        for i in range(1, n):
+            if ts_ns[i] // delta != ts_ns[i - 1] // delta:
+                count += 1
+        keys = numpy.empty(count, numpy.int64)
+        starts = numpy.empty(count, numpy.int64)
+        open_ = numpy.empty(count, numpy.float64)
+        high = numpy.empty(count, numpy.float64)
+        low = numpy.empty(count, numpy.float64)
+        close = numpy.empty(count, numpy.float64)
+        j = 0
+        keys[0], starts[0] = ts_ns[0] // delta, 0
+        open_[0] = high[0] = low[0] = close[0] = price[0]
+        for i in range(1, n):
+            key = ts_ns[i] // delta
+            value = price[i]
+            if key != keys[j]:
+                j += 1
+                keys[j], starts[j] = key, i
+                open_[j] = high[j] = low[j] = value
+            else:
+                high[j] = max(high[j], value)
+                low[j] = min(low[j], value)
+            close[j] = value
+        return keys, starts, open_, high, low, close
+else:
+    def _bucketize_ohlc(ts_ns, price, delta):
+        """
+        OHLC over ticks sorted by ts_ns, numpy fallback when numba is absent
+        :return: bucket numbers, bucket start indexes, open, high, low, close
+        """
+        _, buckets, starts, ends = _bucket_edges(ts_ns, delta, assume_sorted=True)
+        return (
+            buckets[starts],
+            starts,
+            price[starts],
+            numpy.maximum.reduceat(price, starts),
+            numpy.minimum.reduceat(price, starts),
+            price[ends]
+        )
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _reduce_candles(opens, closes, highs, lows, starts, ends):
+        """
+        OHLC of candle buckets given by indexes of first and last candles
+        :return: open, close, high, low float64 arrays
+        """
+        count = starts.shape[0]
+        out_open = numpy.empty(count, numpy.float64)
+        out_close = numpy.empty(count, numpy.float64)
+        out_high = numpy.empty(count, numpy.float64)
+        out_low = numpy.empty(count, numpy.float64)
+        for i in prange(count):
+            start, end = starts[i], ends[i]
+            high, low = highs[start], lows[start]
+            for j in range(start + 1, end + 1):
+                high = max(high, highs[j])
+                low = min(low, lows[j])
+            out_open[i], out_close[i] = opens[start], closes[end]
+            out_high[i], out_low[i] = high, low
+        return out_open, out_close, out_high, out_low
+else:
+    def _reduce_candles(opens, closes, highs, lows, starts, ends):
+        """
+        OHLC of candle buckets given by indexes of first and last candles,
+        numpy fallback when numba is absent
+        :return: open, close, high, low float64 arrays
+        """
+        return (
+            opens[starts],
+            closes[ends],
+            numpy.maximum.reduceat(highs, starts),
+            numpy.minimum.reduceat(lows, starts)
+        )
+
+
+def _trades_to_soa(trades, fast: bool = False):
+    """
+    splits list of trades into arrays of timestamps (ns), prices and volumes.
+    Prices stay Decimal (object array), float64 if fast. Volumes are always
+    Decimal so fractional sizes are summed exactly
+    """
+    count = len(trades)
+    ts_ns = numpy.fromiter((t._ts_ns for t in trades), numpy.int64, count=count)
+    price = numpy.fromiter(
+        (t.price for t in trades), numpy.float64 if fast else object, count=count
+    )
+    volume = numpy.array([t.volume for t in trades], dtype=object)
+    return ts_ns, price, volume
+
+
+def _candles_from_arrays(
+        cls,
+        data_type,
+        interval,
+        ts_ns,
+        price,
+        volume=None,
+        assume_sorted=False
+    ):
+    """
+    builds candles of specified interval from columns of ticks
+    :param cls: class of result candles
+    :param data_type: quotes or trades
+    :param interval: '1min', '5min', '1hour', '1day'
+    :param ts_ns: int64 array of timestamps (see _dt_to_ns)
+    :param price: array of prices, Decimal (object) arrays are reduced exactly,
+     float64 ones are exact up to 15 significant digits
+    :param volume: array of volumes or None for quote candles
+    :param assume_sorted: ticks are already sorted by timestamp
+    :return: list of candles sorted by timestamp
+    """
+    delta = _interval_ns(interval)
+    if not len(ts_ns):
+        return []
+    if price.dtype == object:
+        order, buckets, starts, ends = _bucket_edges(ts_ns, delta, assume_sorted)
+        price = price[order]
+        keys = buckets[starts]
+        opens, closes = price[starts], price[ends]
+        highs = numpy.maximum.reduceat(price, starts)
+        lows = numpy.minimum.reduceat(price, starts)
+    else:
+        order = _sort_order(ts_ns, assume_sorted)
+        keys, starts, opens, highs, lows, closes = _bucketize_ohlc(
+            ts_ns[order], price[order], delta
+        )
+    if volume is not None:
+        volumes = numpy.add.reduceat(volume[order], starts).tolist()
+    else:
+        volumes = [None] * len(starts)
+    result = []
+    for bucket, open_, close, high, low, vol in zip(
+            keys.tolist(),
+            opens.tolist(),
+            closes.tolist(),
+            highs.tolist(),
+            lows.tolist(),
+            volumes
+        ):
+        candle = cls.from_floats(
+            data_type=data_type,
+            interval=interval,
+            timestamp=_ns_to_dt(bucket * delta),
+            open_price=open_,
+            close_price=close,
+            max_price=high,
+            min_price=low,
+            volume=vol
+        )
+        result.append(candle)
+    return result
+
+
+def _to_ms(value: datetime) -> int:
+    # integer ms, naive datetimes are local time as for datetime.timestamp()
+    if value.tzinfo is None:
+        value = value.astimezone(timezone.utc)
+    return (value - _EPOCH_UTC) // _ONE_MS
+
+
+def _encode_datetime(value: datetime) -> str:
+    return str(_to_ms(value))
+
+
+_ENCODERS = {
+    datetime: _encode_datetime,
+    Decimal: str,
+    int: str,
+    float: str
+}
 
 
 def json_encoder(value):
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    # subclasses of supported types
     if isinstance(value, datetime):
-        return str(int(value.timestamp() * 1000))
+        return _encode_datetime(value)
     elif isinstance(value, (Decimal, int, float)):
         return str(value)
     else:
         return value
 
 
+def _decode_tree(obj):
+    """
+    applies json_decoder to every object of already parsed JSON
+    """
+    if isinstance(obj, dict):
+        for value in obj.values():
+            if isinstance(value, (dict, list)):
+                _decode_tree(value)
+        json_decoder(obj)
+    elif isinstance(obj, list):
+        for value in obj:
+            if isinstance(value, (dict, list)):
+                _decode_tree(value)
+    return obj
+
+
+def _loads(response: requests.Response, decode: bool = False):
+    """
+    parses JSON body of response, with orjson when it is installed
+    :param decode: convert numeric and datetime strings as json_decoder does
+    """
+    if orjson is not None:
+        data = orjson.loads(response.content)
+        return _decode_tree(data) if decode else data
+    return response.json(object_hook=json_decoder) if decode else response.json()
+
+
+def _loads_line(line: bytes):
+    """
+    parses one line of ndjson stream with json_decoder semantics
+    """
+    if orjson is not None:
+        return _decode_tree(orjson.loads(line))
+    return json.loads(line, object_hook=json_decoder)
+
+
+if orjson is not None:
+    # datetimes should go through json_encoder, not orjson's isoformat
+    _ORJSON_LINE = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+
+    def _dumps_line(item, _dumps=orjson.dumps) -> bytes:
+        """
+        encodes item as one line of ndjson stream
+        """
+        return _dumps(item, default=json_encoder, option=_ORJSON_LINE)
+else:
+    _JSON_LINE_ENCODER = json.JSONEncoder(default=json_encoder)
+
+    def _dumps_line(item) -> bytes:
+        """
+        encodes item as one line of ndjson stream
+        """
+        return (_JSON_LINE_ENCODER.encode(item) + '\n').encode()
+
+
+def _iter_ndjson(response: requests.Response, chunk_size: int = _STREAM_CHUNK):
+    """
+    parses ndjson response reading it by big chunks instead of line by line,
+    broken or empty lines are skipped
+    """
+    tail = b''
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        lines = (tail + chunk).split(b'\n')
+        tail = lines.pop()
+        for line in lines:
+            try:
+                yield _loads_line(line)
+            except ValueError:
+                pass
+    if tail:
+        try:
+            yield _loads_line(tail)
+        except ValueError:
+            pass
+
+
+@functools.lru_cache(maxsize=None)
+def _slot_names(cls) -> tuple:
+    """
+    names of all slots of class and its parents, private ones are mangled
+    """
+    names = []
+    for klass in cls.__mro__:
+        for name in getattr(klass, '__slots__', ()):
+            if name.startswith('__') and not name.endswith('__'):
+                name = f"_{klass.__name__.lstrip('_')}{name}"
+            names.append(name)
+    return tuple(names)
+
+
 """
 QDictator types
 """
@@ -134,6 +589,7 @@ class iDictator:
     Interface for classes how can post to dictator
     """
     __metaclass__ = ABCMeta
+    __slots__ = ()
 
     @abstractmethod
     def dictator_dict(self): raise NotImplementedError
@@ -166,6 +622,10 @@ class MarketData:
         'implied_forward_price',
         'risk_free_rate'
     )
+    # value attributes of subclasses, compared and hashed along with
+    # data, interval and position
+    FIELDS = ()
+    __slots__ = ('__data', '__interval', '__position', '_key', '_hash', '_repr', '_api')
 
     def __init__(
             self,
@@ -173,6 +633,7 @@ class MarketData:
             interval: str = None,
             position: str = None
         ):
+        self._key = self._hash = self._repr = self._api = None
         self.data = data_type
         self.interval = interval
         self.position = position
@@ -188,6 +649,7 @@ class MarketData:
                 f"Invalid data type, expected one of following: {', '.join(self.TYPES)}"
             )
         self.__data = value
+        self._key = self._hash = self._repr = self._api = None
 
     @property
     def interval(self):
@@ -200,6 +662,7 @@ class MarketData:
                 f"Invalid interval, expected one of following: {', '.join(self.INTERVALS)}"
             )
         self.__interval = value
+        self._key = self._hash = self._repr = self._api = None
 
     @property
     def position(self):
@@ -212,26 +675,62 @@ class MarketData:
                 f"Invalid position, expected one of following: {', '.join(self.POSITIONS)}"
             )
         self.__position = value
+        self._key = self._hash = self._repr = self._api = None
 
     def __repr__(self):
-        interval=f', {self.interval=}' if self.interval else ''
-        position=f', {self.position=}' if self.position else ''
-        return f'MarketData({self.data=}{interval}{position})'
+        if self._repr is None:
+            interval=f', {self.interval=}' if self.interval else ''
+            position=f', {self.position=}' if self.position else ''
+            self._repr = f'MarketData({self.data=}{interval}{position})'
+        return self._repr
+
+    def _get_key(self):
+        if self._key is None:
+            self._key = (self.__data, self.__interval, self.__position)
+            self._hash = hash(self._key)
+        return self._key
+
     def __hash__(self):
-        return hash(self.__repr__())
+        key = self._get_key()
+        if self.FIELDS:
+            return hash((key, *(getattr(self, f) for f in self.FIELDS)))
+        return self._hash
 
     def __eq__(self, other):
-        try:
-            return self.__dict__ == other.__dict__
-        except AttributeError:
+        if type(other) is not type(self):
             return False
+        return self._get_key() == other._get_key() and all(
+            getattr(self, f) == getattr(other, f) for f in self.FIELDS
+        )
+
+    def clone(self, **overrides):
+        """
+        copy of instance without deepcopy, all the fields are immutable
+        :param overrides: new values of attributes, set through their setters
+        :return: new instance of the same class
+        """
+        result = object.__new__(type(self))
+        for name in _slot_names(type(self)):
+            try:
+                setattr(result, name, getattr(self, name))
+            except AttributeError:
+                pass
+        if hasattr(self, '__dict__'):
+            result.__dict__.update(self.__dict__)
+        for name, value in overrides.items():
+            setattr(result, name, value)
+        return result
 
     @classmethod
     def all_available(cls):
         """
-        Generator that returns instances of MarketData class with all
-        available types and intervals
+        Iterator over instances of MarketData class with all available types
+        and intervals. Instances are built once and shared, don't modify them
         """
+        return iter(_ALL_AVAILABLE)
+
+    @classmethod
+    def _build_all_available(cls):
         for data_type in cls.TYPES[:2]:
             yield cls(data_type)
             for interval in cls.INTERVALS:
@@ -246,38 +745,51 @@ class MarketData:
         yield cls(cls.TYPES[3])
         return
 
+    def _finalize(self):
+        """
+        computes api names derived from data, interval and position,
+        they are cached until one of those is changed
+        """
+        is_candle = bool(self.__interval)
+        if is_candle:
+            data_type = self.data[:-1] if self.data != 'option_data' else self.data
+            position=f'/{self.position}' if self.position else ''
+            quote_api = f'{data_type}_candles/{self.interval}{position}'
+            data=f'{self.data[0]}candle' if self.data != 'option_data' else self.data
+            mid='mid_' if self.data == 'quotes' else ''
+            qdictator = f'{data}_{mid}{self.interval}'
+            data=f'{self.data[0]}candles' if self.data != 'option_data' else self.data
+            import_api = f'{data}/{self.interval}'
+        else:
+            quote_api = qdictator = self.data
+            import_api = self.data if self.data != 'prices' else 'price'
+        self._api = (is_candle, quote_api, qdictator, import_api)
+        return self._api
+
     @property
     def is_candle(self):
-        return bool(self.interval)
+        return (self._api or self._finalize())[0]
 
     @property
     def quote_api(self):
-        if self.is_candle:
-            data_type = self.data[:-1] if self.data != 'option_data' else self.data
-            position=f'/{self.position}' if self.position else ''
-            return f'{data_type}_candles/{self.interval}{position}'
-        else:
-            return self.data
+        return (self._api or self._finalize())[1]
 
     @property
     def qdictator(self):
-        if self.is_candle:
-            data=f'{self.data[0]}candle' if self.interval and self.data != 'option_data' else self.data
-            mid='mid_' if self.data == 'quotes' else ''
-            return f'{data}_{mid}{self.interval}'
-        else:
-            return self.data
+        return (self._api or self._finalize())[2]
 
     @property
     def import_api(self):
-        if self.is_candle:
-            data=f'{self.data[0]}candles' if self.interval and self.data != 'option_data' else self.data
-            return f'{data}/{self.interval}'
-        else:
-            return self.data if self.data != 'prices' else 'price'
+        return (self._api or self._finalize())[3]
+
+
+_ALL_AVAILABLE = tuple(MarketData._build_all_available())
 
 
 class Trade(MarketData, iDictator):
+    FIELDS = ('timestamp', 'price', 'volume')
+    __slots__ = ('__timestamp', '__price', '__volume', '_ts_ns')
+
     def __init__(
             self,
             timestamp: Union[datetime, str],
@@ -295,7 +807,8 @@ class Trade(MarketData, iDictator):
 
     @timestamp.setter
     def timestamp(self, value):
-        self.__timestamp = value if isinstance(value, datetime) else parser.parse(value)
+        self.__timestamp = value if isinstance(value, datetime) else _parse_ts(value)
+        self._ts_ns = _dt_to_ns(self.__timestamp)
 
     @property
     def price(self):
@@ -303,7 +816,7 @@ class Trade(MarketData, iDictator):
 
     @price.setter
     def price(self, value):
-        self.__price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__price = _to_decimal(value)
 
     @property
     def volume(self):
@@ -311,7 +824,7 @@ class Trade(MarketData, iDictator):
 
     @volume.setter
     def volume(self, value):
-        self.__volume = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__volume = _to_decimal(value)
 
     def __repr__(self):
         return f'Trade({self.timestamp=}, {self.price=}, {self.volume=})'
@@ -327,9 +840,9 @@ class Trade(MarketData, iDictator):
     @staticmethod
     def from_dict(data):
         try:
-            timestamp = parser.parse(data['time'])
-            price = Decimal(str(data['price']))
-            volume = Decimal(str(data['size']))
+            timestamp = data['time']
+            price = _to_decimal(data['price'])
+            volume = _to_decimal(data['size'])
         except KeyError as e:
             raise ValueError(f'Invalid dict for Trade - reason {e}')
         except IndexError as e:
@@ -337,32 +850,61 @@ class Trade(MarketData, iDictator):
         return Trade(timestamp, price, volume)
 
     @staticmethod
-    def enlarge_your_trades(trades_list, interval='1min'):
+    def enlarge_your_trades(trades_list, interval='1min', assume_sorted=False, fast=False):
         """
         Method for generating bigger candles from list of smaller candles DO NOT mix quote and trade candles
-        :param trades_list: list of Candle objects
+        :param trades_list: list of Trade objects or TradeArray
         :param interval: '1min', '5min', '1hour', '1day'
+        :param assume_sorted: trades are already sorted by timestamp
+        :param fast: reduce prices as float64, exact up to 15 significant digits.
+         TradeArray prices are always float64
+        """
+        if isinstance(trades_list, TradeArray):
+            columns = trades_list.ts_ns, trades_list.price, trades_list.volume
+        elif trades_list:
+            columns = _trades_to_soa(trades_list, fast)
+        else:
+            return []
+        return _candles_from_arrays(
+            Candle, 'trades', interval, *columns, assume_sorted=assume_sorted
+        )
+
+
+class TradeArray:
+    """
+    Column storage of trades: timestamps as int64 ns, prices as float64,
+    volumes as Decimal (or float64) array. Candles built from TradeArray
+    are the same as built from list of Trade objects within 15 significant
+    digits of prices.
+    """
+    def __init__(self, ts_ns, price, volume):
         """
-        interval_dict = {}
-        trades_list = sorted(trades_list, key=lambda x: x.timestamp)
-        for i in trades_list:
-            key = key_generator(i, interval)
-            interval_dict.setdefault(key, [])
-            interval_dict[key].append(i)
-        result = []
-        for i in interval_dict:
-            candle = Candle(
-                data_type='trades',
-                interval=interval,
-                timestamp=i,
-                max_price=max(j.price for j in interval_dict[i]),
-                min_price=min(j.price for j in interval_dict[i]),
-                open_price=interval_dict[i][0].price,
-                close_price=interval_dict[i][-1].price,
-                volume=sum(j.volume for j in interval_dict[i])
-            )
-            result.append(candle)
-        return result
+        :param ts_ns: timestamps in ns since epoch (UTC)
+        :param price: prices
+        :param volume: volumes
+        """
+        self.ts_ns = numpy.asarray(ts_ns, dtype=numpy.int64)
+        self.price = numpy.asarray(price, dtype=numpy.float64)
+        self.volume = numpy.asarray(volume)
+        if not len(self.ts_ns) == len(self.price) == len(self.volume):
+            raise ValueError('Columns of TradeArray should have same length')
+
+    def __len__(self):
+        return len(self.ts_ns)
+
+    def __repr__(self):
+        return f'TradeArray({len(self)} trades)'
+
+    @classmethod
+    def from_iterable(cls, trades):
+        return cls(*_trades_to_soa(list(trades), fast=True))
+
+    def to_trades(self):
+        return [
+            Trade(_ns_to_dt(ts), _to_decimal(price), volume)
+            for ts, price, volume
+            in zip(self.ts_ns.tolist(), self.price.tolist(), self.volume.tolist())
+        ]
 
 
 class Quote(MarketData):
@@ -371,6 +913,8 @@ class Quote(MarketData):
 
     """
     SIDES = ('bid', 'ask')
+    FIELDS = ('side', 'timestamp', 'price', 'volume')
+    __slots__ = ('__side', '__timestamp', '__price', '__volume', '_ts_ns')
 
     def __init__(
             self,
@@ -401,7 +945,8 @@ class Quote(MarketData):
 
     @timestamp.setter
     def timestamp(self, value):
-        self.__timestamp = value if isinstance(value, datetime) else parser.parse(value)
+        self.__timestamp = value if isinstance(value, datetime) else _parse_ts(value)
+        self._ts_ns = _dt_to_ns(self.__timestamp)
 
     @property
     def price(self):
@@ -409,7 +954,7 @@ class Quote(MarketData):
 
     @price.setter
     def price(self, value):
-        self.__price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__price = _to_decimal(value)
 
     @property
     def volume(self):
@@ -417,7 +962,7 @@ class Quote(MarketData):
 
     @volume.setter
     def volume(self, value):
-        self.__volume = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__volume = _to_decimal(value)
 
     def __repr__(self):
         return f'Quote({self.timestamp}, {self.side=}, {self.price=}, {self.volume=})'
@@ -427,6 +972,73 @@ class Quote(MarketData):
         return {'price': self.price, 'size': self.volume}
 
 
+class QuoteArray:
+    """
+    Column storage of quotes: timestamps as int64 ns, side as bool (True for bid),
+    prices and volumes as float64. Quotes rebuilt from QuoteArray (to_quotes,
+    MarketDepth.from_quotes) carry float-derived Decimals: equal to the
+    original values within 15 significant digits, Decimal('2') comes back
+    as Decimal('2.0')
+    """
+    def __init__(self, ts_ns, is_bid, price, volume):
+        """
+        :param ts_ns: timestamps in ns since epoch (UTC)
+        :param is_bid: True for bids, False for asks
+        :param price: prices
+        :param volume: volumes
+        """
+        self.ts_ns = numpy.asarray(ts_ns, dtype=numpy.int64)
+        self.is_bid = numpy.asarray(is_bid, dtype=bool)
+        self.price = numpy.asarray(price, dtype=numpy.float64)
+        self.volume = numpy.asarray(volume, dtype=numpy.float64)
+        if not len(self.ts_ns) == len(self.is_bid) == len(self.price) == len(self.volume):
+            raise ValueError('Columns of QuoteArray should have same length')
+
+    def __len__(self):
+        return len(self.ts_ns)
+
+    def __repr__(self):
+        return f'QuoteArray({len(self)} quotes)'
+
+    @classmethod
+    def from_iterable(cls, quotes):
+        quotes = list(quotes)
+        count = len(quotes)
+        return cls(
+            numpy.fromiter((q._ts_ns for q in quotes), numpy.int64, count=count),
+            numpy.fromiter((q.side == 'bid' for q in quotes), bool, count=count),
+            numpy.fromiter((q.price for q in quotes), numpy.float64, count=count),
+            numpy.fromiter((q.volume for q in quotes), numpy.float64, count=count)
+        )
+
+    def to_quotes(self):
+        return [
+            Quote(_ns_to_dt(ts), 'bid' if is_bid else 'ask', _to_decimal(price), _to_decimal(volume))
+            for ts, is_bid, price, volume
+            in zip(
+                self.ts_ns.tolist(),
+                self.is_bid.tolist(),
+                self.price.tolist(),
+                self.volume.tolist()
+            )
+        ]
+
+
+_TS_NS = attrgetter('_ts_ns')
+# time and prices of candle dict in order of Candle/OptionDataCandle arguments
+_CANDLE_FIELDS = itemgetter('time', 'open_price', 'close_price', 'max_price', 'min_price')
+_QUOTE_PRICE = attrgetter('_Quote__price')
+_QUOTE_SIDE = attrgetter('_Quote__side')
+
+
+def _depth_mid_f64(depth) -> float:
+    # float mid of best prices for vectorized candle building, nan if one side is empty
+    try:
+        return float(depth.bid[0].price + depth.ask[0].price) / 2
+    except IndexError:
+        return numpy.nan
+
+
 class MarketDepth(iDictator):
     """
     Class represents Quote/market depth: two list of quotes sorted by price. First
@@ -438,6 +1050,14 @@ class MarketDepth(iDictator):
     quote_api = 'quotes'
     interval = None
     position = None
+    __slots__ = (
+        'bid',
+        'ask',
+        'bid_yield',
+        'ask_yield',
+        '__timestamp',
+        '_ts_ns'
+    )
 
     def __init__(
             self,
@@ -445,7 +1065,8 @@ class MarketDepth(iDictator):
             bid: List[Quote],
             ask: List[Quote],
             bid_yield: Decimal = None,
-            ask_yield: Decimal = None
+            ask_yield: Decimal = None,
+            _sorted: bool = False
         ):
         """
         :param timestamp: timestamp of MarketDepth instance
@@ -453,23 +1074,35 @@ class MarketDepth(iDictator):
         :param ask: list of quotes
         :param bid_yield: yield (for bonds)
         :param ask_yield: yield (for bonds)
+        :param _sorted: bid and ask are already sorted lists of right sides,
+         skip sorting and validation (internal use)
         """
+        if _sorted:
+            self.bid = bid
+            self.ask = ask
+        else:
+            self.__sort_quotes(bid, ask)
+        self.bid_yield = bid_yield
+        self.ask_yield = ask_yield
+        self.timestamp = timestamp
+
+    def __sort_quotes(self, bid, ask):
         try:
             self.bid = sorted(
                 bid,
-                key=lambda x: x.price,
+                key=_QUOTE_PRICE,
                 reverse=True
             )
             self.ask = sorted(
                 ask,
-                key=lambda x: x.price,
+                key=_QUOTE_PRICE,
                 reverse=False
             )
-            if not all(x.side == 'bid' for x in self.bid):
+            if not set(map(_QUOTE_SIDE, self.bid)) <= {'bid'}:
                 raise ValueError(
                     f"Param 'bid' should be a list of bid quotes"
                 )
-            if not all(x.side == 'ask' for x in self.ask):
+            if not set(map(_QUOTE_SIDE, self.ask)) <= {'ask'}:
                 raise ValueError(
                     f"Param 'ask' should be a list of ask quotes"
                 )
@@ -477,9 +1110,17 @@ class MarketDepth(iDictator):
             raise TypeError(
                 f"Params 'ask' and 'bid' should be a lists of quotes"
             )
-        self.bid_yield = bid_yield
-        self.ask_yield = ask_yield
-        self.timestamp = timestamp
+
+    @property
+    def timestamp(self):
+        return self.__timestamp
+
+    @timestamp.setter
+    def timestamp(self, value):
+        if isinstance(value, str):
+            value = _parse_ts(value)
+        self.__timestamp = value
+        self._ts_ns = _dt_to_ns(value) if isinstance(value, datetime) else None
 
     def __repr__(self):
         bid_yield=f', {self.bid_yield=}' if self.bid_yield else ''
@@ -511,7 +1152,7 @@ class MarketDepth(iDictator):
     @classmethod
     def from_quotes(
             cls,
-            quotes: list[Quote],
+            quotes: Union[List[Quote], QuoteArray],
             bid_yield: Decimal = None,
             ask_yield: Decimal = None
         ):
@@ -519,22 +1160,40 @@ class MarketDepth(iDictator):
         Method makes correct MarketDepth from unsorted list of quotes.
         Returned MarketDepth instance has timestamp of oldest quote in passed
         list of quotes.
-        :param quotes: list of quotes. All timestamps of quotes must be either
-         aware or naive. Mixing will cause TypeError.
+        :param quotes: list of quotes or QuoteArray. All timestamps of quotes
+         must be either aware or naive. Mixing will cause TypeError.
         :param bid_yield: bid yield (for bonds)
         :param ask_yield: ask yield (for bonds)
         :return: instance of MarketDepth
         """
+        if isinstance(quotes, QuoteArray):
+            timestamp = _ns_to_dt(quotes.ts_ns[-1])
+            # sort here so quotes go to MarketDepth in price order already,
+            # stable on ties as sorted() in __init__
+            bid_idx = numpy.flatnonzero(quotes.is_bid)
+            ask_idx = numpy.flatnonzero(~quotes.is_bid)
+            bid_idx = bid_idx[numpy.argsort(-quotes.price[bid_idx], kind='stable')]
+            ask_idx = ask_idx[numpy.argsort(quotes.price[ask_idx], kind='stable')]
+            quotes = quotes.to_quotes()
+            return cls(
+                timestamp,
+                [quotes[i] for i in bid_idx.tolist()],
+                [quotes[i] for i in ask_idx.tolist()],
+                bid_yield,
+                ask_yield,
+                _sorted=True
+            )
         bids, asks = [], []
+        add_bid, add_ask = bids.append, asks.append
         if quotes[0].timestamp.tzinfo:
             default_timestamp = datetime(1970, 1, 1, tzinfo=timezone.utc)
         else:
             default_timestamp = datetime.fromtimestamp(0)
         for quote in quotes:
             if quote.side == 'bid':
-                bids.append(quote)
+                add_bid(quote)
             else:
-                asks.append(quote)
+                add_ask(quote)
             timestamp = max(default_timestamp, quote.timestamp)
         return cls(timestamp, bids, asks, bid_yield, ask_yield)
 
@@ -572,36 +1231,40 @@ class MarketDepth(iDictator):
             'ask': Union[float, Decimal]
         }
         """
-        quotes = []
+        bid, ask = data.get('bid'), data.get('ask')
+        if bid is None and ask is None:
+            return None
+        # (price, volume) pairs of each side
+        levels = {}
         yields = {}
-        for side in ('bid', 'ask'):
-            if data.get(side) is not None:
-                if isinstance(data[side], (float, int, Decimal)):
-                    quotes.append(
-                        Quote(
-                            timestamp=data['time'] if 'time' in data else data['frame_time'],
-                            side=side,
-                            price=data[side]
-                        )
-                    )
-                elif isinstance(data[side], dict):
-                    yields[side] = data[side].get('yield')
-                    try:
-                        quotes.extend([
-                            Quote(
-                                timestamp=data['time'] if 'time' in data else data['frame_time'],
-                                side=side,
-                                price=p_data['price'],
-                                volume=p_data['size']
-                            ) for p_data
-                            in data[side]['pricedata']
-                        ])
-                    except KeyError:
-                        raise ValueError('Invalid dict for MarketDepth')
-                else:
-                    raise ValueError('Invalid data format for MarketDepth')
-        if quotes:
-            return cls.from_quotes(quotes, yields.get('bid'), yields.get('ask'))
+        for side, side_data in (('bid', bid), ('ask', ask)):
+            if side_data is None:
+                levels[side] = []
+            elif isinstance(side_data, (float, int, Decimal)):
+                levels[side] = [(side_data, 1)]
+            elif isinstance(side_data, dict):
+                yields[side] = side_data.get('yield')
+                try:
+                    levels[side] = [
+                        (p_data['price'], p_data['size'])
+                        for p_data in side_data['pricedata']
+                    ]
+                except KeyError:
+                    raise ValueError('Invalid dict for MarketDepth')
+            else:
+                raise ValueError('Invalid data format for MarketDepth')
+        if not (levels['bid'] or levels['ask']):
+            return None
+        timestamp = data['time'] if 'time' in data else data['frame_time']
+        if not isinstance(timestamp, datetime):
+            timestamp = _parse_ts(timestamp)
+        return cls(
+            timestamp,
+            [Quote(timestamp, 'bid', price, volume) for price, volume in levels['bid']],
+            [Quote(timestamp, 'ask', price, volume) for price, volume in levels['ask']],
+            yields.get('bid'),
+            yields.get('ask')
+        )
 
     @property
     def dictator_dict(self):
@@ -670,66 +1333,67 @@ class MarketDepth(iDictator):
         :param index: place for new quote
         :return: patched MarketDepth instance
         """
-        result = deepcopy(self)
         try:
-            depth = getattr(result, quote.side)
-            try:
-                depth[index] = quote
-            except IndexError:
-                depth.append(quote)
-            result.timestamp = quote.timestamp
+            side = quote.side
+            timestamp = quote.timestamp
         except AttributeError:
             raise TypeError(f'Quote expected, {type(quote)} found')
-        return result
+        bid, ask = list(self.bid), list(self.ask)
+        depth = bid if side == 'bid' else ask
+        try:
+            depth[index] = quote
+        except IndexError:
+            depth.append(quote)
+        return type(self)(
+            timestamp,
+            bid,
+            ask,
+            self.bid_yield,
+            self.ask_yield,
+            _sorted=True
+        )
 
     @classmethod
     def mapBidAsk(cls, bid=None, ask=None):
         return {'bid': bid, 'ask': ask}
 
     @staticmethod
-    def enlarge_your_market_depth(market_depth_list, interval='1min'):
+    def enlarge_your_market_depth(
+            market_depth_list,
+            interval='1min',
+            assume_sorted=False,
+            fast=False
+        ):
         """
         Method for generating bigger candles from list of smaller candles DO NOT mix quote and trade candles
         :param market_depth_list: list of marketDepth objects
         :param interval: '1min', '5min', '1hour', '1day'
-        """
-        interval_dict = {}
-        market_depth_list = sorted(market_depth_list, key=lambda x: x.timestamp)
-        for i in market_depth_list:
-            key = key_generator(i, interval)
-            interval_dict.setdefault(key, [])
-            interval_dict[key].append(i)
-        candles = []
-        for qinterval, quotes in interval_dict.items():
-            result_interval = {}
-            r_quotes = []
-            for quote in quotes:
-                pairs = map(lambda x, y: {'bid': y, 'ask': x}, [ask.price for ask in quote.ask],
-                            [bid.price for bid in quote.bid])
-                mid_pairs = [pair['bid'] + pair['ask'] / 2 for pair in pairs]
-                mid = numpy.mean(mid_pairs)
-                r_quotes.append({'quote': quote, 'mid': mid})
-            result_interval["time"] = qinterval
-            result_interval['interval'] = interval
-            result_interval['max_price'] = max(quote['mid'] for quote in r_quotes)
-            result_interval['min_price'] = min(quote['mid'] for quote in r_quotes)
-            result_interval['open_price'] = r_quotes[0]['mid']
-            result_interval['close_price'] = r_quotes[-1]['mid']
-            candles.append(result_interval)
-        result = []
-        for can in candles:
-            candle = Candle(
-                data_type='quotes',
-                interval=can['interval'],
-                timestamp=can['time'],
-                max_price=can['max_price'],
-                min_price=can['min_price'],
-                open_price=can['open_price'],
-                close_price=can['close_price'],
-                volume=None
+        :param assume_sorted: depths are already sorted by timestamp
+        :param fast: reduce mids as float64, exact up to 15 significant digits
+        """
+        # depths without timestamp can't be put into any candle
+        market_depth_list = [d for d in market_depth_list if d._ts_ns is not None]
+        if fast:
+            count = len(market_depth_list)
+            ts_ns = numpy.fromiter(
+                (d._ts_ns for d in market_depth_list), numpy.int64, count=count
             )
-            result.append(candle)
-        return result
+            mids = numpy.fromiter(
+                map(_depth_mid_f64, market_depth_list), numpy.float64, count=count
+            )
+            complete = ~numpy.isnan(mids)
+            ts_ns, mids = ts_ns[complete], mids[complete]
+        else:
+            # depths with one side empty have no mid
+            complete = [d for d in market_depth_list if d.bid and d.ask]
+            count = len(complete)
+            ts_ns = numpy.fromiter((d._ts_ns for d in complete), numpy.int64, count=count)
+            mids = numpy.fromiter(
+                ((d.bid[0].price + d.ask[0].price) / 2 for d in complete), object, count=count
+            )
+        return _candles_from_arrays(
+            Candle, 'quotes', interval, ts_ns, mids, assume_sorted=assume_sorted
+        )
 
     def is_correct(self):
         """
@@ -747,25 +1411,46 @@ class MarketDepth(iDictator):
             logging.warning('MarketDepth has no bids or asks')
             return False
 
-        # damned piece of magic, please don't try to understand it
-        for sequence in (self.bid[::-1], self.ask):
-            for left, right in zip(sequence, islice(sequence, 1, None)):
-                logging.debug(f'Comparing {left} and {right}')
-                if left.price < right.price:
-                    continue
-                elif left.price == right.price:
-                    logging.debug(f'Two equal prices of one side: {left}, {right}')
-                else:
-                    logging.debug(
-                        f'Wrong order of quotes in market depth: '
-                        f'{left} is larger than {right}'
-                    )
+        # bids should strictly decrease, asks strictly increase
+        for name, depth, sign in (('bid', self.bid, -1), ('ask', self.ask, 1)):
+            steps = numpy.diff(
+                numpy.fromiter(map(_QUOTE_PRICE, depth), numpy.float64, count=len(depth))
+            ) * sign
+            if (steps < 0).any():
+                logging.debug('Wrong order of quotes in market depth: %s', name)
                 return False
+            # float64 may merge close Decimal prices, compare them exactly
+            for i in numpy.flatnonzero(steps == 0).tolist():
+                step = (depth[i + 1].price - depth[i].price) * sign
+                if step <= 0:
+                    if step == 0:
+                        logging.debug('Two equal prices of one side: %s', name)
+                    else:
+                        logging.debug('Wrong order of quotes in market depth: %s', name)
+                    return False
 
         return True
 
 
 class Candle(MarketData, iDictator):
+    FIELDS = (
+        'timestamp',
+        'open_price',
+        'close_price',
+        'max_price',
+        'min_price',
+        'volume'
+    )
+    __slots__ = (
+        '__timestamp',
+        '__open_price',
+        '__close_price',
+        '__max_price',
+        '__min_price',
+        '__volume',
+        '_ts_ns'
+    )
+
     def __init__(
             self,
             data_type: str,
@@ -813,7 +1498,7 @@ class Candle(MarketData, iDictator):
 
     @open_price.setter
     def open_price(self, value):
-        self.__open_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__open_price = _to_decimal(value)
 
     @property
     def close_price(self):
@@ -821,7 +1506,7 @@ class Candle(MarketData, iDictator):
 
     @close_price.setter
     def close_price(self, value):
-        self.__close_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__close_price = _to_decimal(value)
 
     @property
     def max_price(self):
@@ -829,7 +1514,7 @@ class Candle(MarketData, iDictator):
 
     @max_price.setter
     def max_price(self, value):
-        self.__max_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__max_price = _to_decimal(value)
 
     @property
     def min_price(self):
@@ -837,7 +1522,7 @@ class Candle(MarketData, iDictator):
 
     @min_price.setter
     def min_price(self, value):
-        self.__min_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__min_price = _to_decimal(value)
 
     @property
     def volume(self):
@@ -845,7 +1530,7 @@ class Candle(MarketData, iDictator):
 
     @volume.setter
     def volume(self, value):
-        self.__volume = value if isinstance(value, Decimal) or value is None else Decimal(str(value))
+        self.__volume = None if value is None else _to_decimal(value)
 
     @property
     def timestamp(self):
@@ -853,7 +1538,8 @@ class Candle(MarketData, iDictator):
 
     @timestamp.setter
     def timestamp(self, value):
-        self.__timestamp = value if isinstance(value, datetime) else parser.parse(value)
+        self.__timestamp = value if isinstance(value, datetime) else _parse_ts(value)
+        self._ts_ns = _dt_to_ns(self.__timestamp)
 
     def __repr__(self):
         return (
@@ -879,12 +1565,12 @@ class Candle(MarketData, iDictator):
     @staticmethod
     def from_dict(data_type, interval, data):
         try:
-            timestamp = parser.parse(data['frame_time'])
-            open_price = Decimal(str(data['open_price']))
-            close_price = Decimal(str(data['close_price']))
-            min_price = Decimal(str(data['min_price']))
-            max_price = Decimal(str(data['max_price']))
-            volume = Decimal(str(data['volume'])) if data.get('volume') else None
+            timestamp = data['frame_time']
+            open_price = _to_decimal(data['open_price'])
+            close_price = _to_decimal(data['close_price'])
+            min_price = _to_decimal(data['min_price'])
+            max_price = _to_decimal(data['max_price'])
+            volume = _to_decimal(data['volume']) if data.get('volume') else None
         except KeyError as e:
             raise ValueError(f'Invalid dict for Candle - reason {e}')
         except IndexError as e:
@@ -901,64 +1587,86 @@ class Candle(MarketData, iDictator):
             validate=True
         )
 
+    @classmethod
+    def from_floats(
+            cls,
+            data_type: str,
+            interval: str,
+            timestamp: datetime,
+            open_price: Union[float, Decimal],
+            close_price: Union[float, Decimal],
+            max_price: Union[float, Decimal],
+            min_price: Union[float, Decimal],
+            volume: Union[float, Decimal] = None
+        ):
+        """
+        Builds candle from already consistent float (or Decimal) prices,
+        e.g. computed aggregates, skipping validation
+        """
+        return cls(
+            data_type=data_type,
+            interval=interval,
+            timestamp=timestamp,
+            open_price=open_price,
+            close_price=close_price,
+            max_price=max_price,
+            min_price=min_price,
+            volume=volume,
+            validate=False
+        )
+
     def is_correct(self):
         return self.min_price <= self.open_price <= self.max_price and \
                self.min_price <= self.close_price <= self.max_price
 
     @classmethod
-    def from_ticks(cls, ticks: list, interval: str):
+    def from_ticks(cls, ticks: list, interval: str, fast: bool = False):
         """
         Method gets list of ticks and builds candle
-        :param ticks: list of ticks (Trade or MarketDepth instances)
+        :param ticks: list of ticks (Trade or MarketDepth instances) or TradeArray
         :param interval: string with description of interval
+        :param fast: reduce prices as float64, exact up to 15 significant digits.
+         TradeArray prices are always float64
         :return: list of Candles
         """
 
-        if not ticks:
+        if not len(ticks):
             raise ValueError('Can\'t build candle form empty list of quotes')
 
-        if isinstance(ticks[0], Trade):
-            value_attr = 'price'
-        elif isinstance(ticks[0], MarketDepth):
-            value_attr = 'mid'
-        else:
-            raise TypeError(
-                f'Expected instance if Trade or MarketDepth, {type(ticks[0])} found'
-            )
-
-        interval_dict = {}
-
-        for i in ticks:
-            key = key_generator(i, interval)
-            interval_dict.setdefault(key, [])
-            interval_dict[key].append(i)
-        result = []
-        for i in interval_dict:
-            try:
-                values = [
-                    getattr(i, value_attr) for i
-                    in sorted(
-                        interval_dict[i],
-                        key=lambda x: x.timestamp
-                    )
-                ]
-            except AttributeError:
-                raise TypeError('Ticks should have same type')
-
-            candle = cls(
-                data_type='quotes' if value_attr == 'mid' else 'trades',
-                interval=interval,
-                timestamp=i,
-                max_price=max(values),
-                min_price=min(values),
-                open_price=values[0],
-                close_price=values[-1]
+        if isinstance(ticks, TradeArray):
+            return _candles_from_arrays(
+                cls, 'trades', interval, ticks.ts_ns, ticks.price, ticks.volume
             )
-            if value_attr == 'price':
-                candle.data = 'trades'
-                candle.volume = sum(j.volume for j in interval_dict[i])
-            result.append(candle)
-        return result
+        try:
+            if isinstance(ticks[0], Trade):
+                return _candles_from_arrays(
+                    cls, 'trades', interval, *_trades_to_soa(ticks, fast)
+                )
+            elif isinstance(ticks[0], MarketDepth):
+                # depths without timestamp can't be put into any candle
+                ticks = [t for t in ticks if t._ts_ns is not None]
+                count = len(ticks)
+                ts_ns = numpy.fromiter((t._ts_ns for t in ticks), numpy.int64, count=count)
+                if fast:
+                    mids = numpy.fromiter(map(_depth_mid_f64, ticks), numpy.float64, count=count)
+                else:
+                    mids = numpy.fromiter((t.mid for t in ticks), object, count=count)
+            else:
+                raise TypeError(
+                    f'Expected instance if Trade or MarketDepth, {type(ticks[0])} found'
+                )
+        except AttributeError:
+            raise TypeError('Ticks should have same type')
+        if fast:
+            # incomplete depths: mid falls back to the only side available
+            for i in numpy.flatnonzero(numpy.isnan(mids)).tolist():
+                mid = ticks[i].mid
+                if mid is not None:
+                    mids[i] = mid
+            complete = ~numpy.isnan(mids)
+        else:
+            complete = numpy.fromiter((mid is not None for mid in mids), bool, count=count)
+        return _candles_from_arrays(cls, 'quotes', interval, ts_ns[complete], mids[complete])
 
     def swap_type(self, volume: int = 1):
         """
@@ -970,19 +1678,14 @@ class Candle(MarketData, iDictator):
         :type volume: default volume for candles based on trades
         :return: None
         """
-        result = deepcopy(self)
-
-        if result.data == 'trades':
-            result.data = 'quotes'
-            result.volume = None
-        else:
-            result.data = 'trades'
-            result.volume = volume
-
-        return result
+        if self.data == 'trades':
+            return self.clone(data='quotes', volume=None)
+        return self.clone(data='trades', volume=volume)
 
     def __mul__(self, number):
-        number = Decimal(str(number))
+        return self.__scaled(_to_decimal(number))
+
+    def __scaled(self, number: Decimal):
         return Candle(
             data_type=self.data,
             interval=self.interval,
@@ -994,38 +1697,88 @@ class Candle(MarketData, iDictator):
             volume=self.volume // number if self.volume else None
         )
 
+    @staticmethod
+    def scale_all(candles, number):
+        """
+        Multiplies all candles by the same number (e.g. split adjustment),
+         number is converted to Decimal only once
+        :param candles: iterable of Candle objects
+        :param number: multiplier
+        :return: list of new Candle objects
+        """
+        number = _to_decimal(number)
+        return [candle.__scaled(number) for candle in candles]
+
     @classmethod
-    def enlarge_your_candle(cls, candle_list, interval='1day'):
+    def enlarge_your_candle(cls, candle_list, interval='1day', fast=False):
         """
         Method for generating bigger candles from list of smaller candles DO NOT mix quote and trade candles
         :param candle_list: list of Candle objects
         :param interval: '1min', '5min', '1hour', '1day'
-        """
-        interval_dict = {}
-        candle_list = sorted(candle_list, key=lambda x: x.timestamp)
-        trades = False
-        if candle_list[0].volume:
-            trades = True
-        for i in candle_list:
-            key = key_generator(i, interval)
-            interval_dict.setdefault(key, [])
-            interval_dict[key].append(i)
+        :param fast: reduce prices as float64, exact up to 15 significant digits
+        """
+        delta = _interval_ns(interval)
+        count = len(candle_list)
+        ts_ns = numpy.fromiter(map(_TS_NS, candle_list), numpy.int64, count=count)
+        order, buckets, starts, ends = _bucket_edges(ts_ns, delta)
+        if not isinstance(order, slice):
+            candle_list = [candle_list[i] for i in order.tolist()]
+        trades = bool(candle_list[0].volume)
+
+        def column(name, dtype=object):
+            # object arrays keep Decimal prices exact
+            return numpy.fromiter(map(attrgetter(name), candle_list), dtype, count=count)
+
+        if fast:
+            opens, closes, highs, lows = _reduce_candles(
+                column('open_price', numpy.float64),
+                column('close_price', numpy.float64),
+                column('max_price', numpy.float64),
+                column('min_price', numpy.float64),
+                starts,
+                ends
+            )
+        else:
+            opens = column('open_price')[starts]
+            closes = column('close_price')[ends]
+            highs = numpy.maximum.reduceat(column('max_price'), starts)
+            lows = numpy.minimum.reduceat(column('min_price'), starts)
+        volumes = numpy.add.reduceat(column('volume'), starts).tolist() \
+            if trades else [None] * len(starts)
         result = []
-        for i in interval_dict:
+        for bucket, open_, close, high, low, vol in zip(
+                buckets[starts].tolist(),
+                opens.tolist(),
+                closes.tolist(),
+                highs.tolist(),
+                lows.tolist(),
+                volumes
+            ):
             candle = cls(
                 data_type='quotes' if not trades else 'trades',
                 interval=interval,
-                timestamp=i,
-                max_price=max(j.max_price for j in interval_dict[i]),
-                min_price=min(j.min_price for j in interval_dict[i]),
-                open_price=interval_dict[i][0].open_price,
-                close_price=interval_dict[i][-1].close_price,
-                volume=None if not trades else sum(j.volume for j in interval_dict[i]))
+                timestamp=_ns_to_dt(bucket * delta),
+                max_price=high,
+                min_price=low,
+                open_price=open_,
+                close_price=close,
+                volume=vol)
             result.append(candle)
         return result
 
 
 class OptionData(MarketData, iDictator):
+    FIELDS = (
+        'timestamp',
+        'implied_volatility',
+        'theoretical_price',
+        'delta',
+        'vega',
+        'theta',
+        'gamma'
+    )
+    __slots__ = FIELDS
+
     def __init__(
             self,
             timestamp: datetime,
@@ -1085,6 +1838,22 @@ class OptionData(MarketData, iDictator):
 
 
 class OptionDataCandle(MarketData, iDictator):
+    FIELDS = (
+        'timestamp',
+        'open_price',
+        'close_price',
+        'max_price',
+        'min_price'
+    )
+    __slots__ = (
+        '__timestamp',
+        '__open_price',
+        '__close_price',
+        '__max_price',
+        '__min_price',
+        '_ts_ns'
+    )
+
     def __init__(
             self,
             data_type: str,
@@ -1132,7 +1901,7 @@ class OptionDataCandle(MarketData, iDictator):
 
     @open_price.setter
     def open_price(self, value):
-        self.__open_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__open_price = _to_decimal(value)
 
     @property
     def close_price(self):
@@ -1140,7 +1909,7 @@ class OptionDataCandle(MarketData, iDictator):
 
     @close_price.setter
     def close_price(self, value):
-        self.__close_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__close_price = _to_decimal(value)
 
     @property
     def max_price(self):
@@ -1148,7 +1917,7 @@ class OptionDataCandle(MarketData, iDictator):
 
     @max_price.setter
     def max_price(self, value):
-        self.__max_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__max_price = _to_decimal(value)
 
     @property
     def min_price(self):
@@ -1156,7 +1925,7 @@ class OptionDataCandle(MarketData, iDictator):
 
     @min_price.setter
     def min_price(self, value):
-        self.__min_price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__min_price = _to_decimal(value)
 
     @property
     def timestamp(self):
@@ -1164,7 +1933,8 @@ class OptionDataCandle(MarketData, iDictator):
 
     @timestamp.setter
     def timestamp(self, value):
-        self.__timestamp = value if isinstance(value, datetime) else parser.parse(value)
+        self.__timestamp = value if isinstance(value, datetime) else _parse_ts(value)
+        self._ts_ns = _dt_to_ns(self.__timestamp)
 
     def __repr__(self):
         return (
@@ -1175,7 +1945,7 @@ class OptionDataCandle(MarketData, iDictator):
         )
 
     def __mul__(self, number):
-        number = Decimal(str(number))
+        number = _to_decimal(number)
         return OptionDataCandle(
             data_type=self.data,
             interval=self.interval,
@@ -1189,6 +1959,9 @@ class OptionDataCandle(MarketData, iDictator):
 
 
 class Price(MarketData, iDictator):
+    FIELDS = ('timestamp', 'price')
+    __slots__ = ('__timestamp', '__price', '_ts_ns')
+
     def __init__(self, timestamp: Union[datetime, str], price: Decimal):
         super(Price, self).__init__('prices')
         self.timestamp = timestamp
@@ -1200,7 +1973,8 @@ class Price(MarketData, iDictator):
 
     @timestamp.setter
     def timestamp(self, value):
-        self.__timestamp = value if isinstance(value, datetime) else parser.parse(value)
+        self.__timestamp = value if isinstance(value, datetime) else _parse_ts(value)
+        self._ts_ns = _dt_to_ns(self.__timestamp)
 
     @property
     def price(self):
@@ -1208,7 +1982,7 @@ class Price(MarketData, iDictator):
 
     @price.setter
     def price(self, value):
-        self.__price = value if isinstance(value, Decimal) else Decimal(str(value))
+        self.__price = _to_decimal(value)
 
     def __repr__(self):
         return f'Price({repr(self.timestamp)}, price={repr(self.price)})'
@@ -1223,7 +1997,7 @@ class Price(MarketData, iDictator):
     @staticmethod
     def from_dict(data):
         try:
-            timestamp = parser.parse(data['time'])
+            timestamp = data['time']
             price = Decimal(data['price'])
         except KeyError as e:
             raise ValueError(f'Invalid dict for Price - reason {e}')
@@ -1239,6 +2013,15 @@ Main TickDB3 Api
 
 
 class TickDB3:
+    # port of node APIs for each data type
+    PORTS = {
+        'trades': ':8181',
+        'quotes': ':8181',
+        'option_data': ':8181',
+        'prices': ':8182'
+    }
+    # seconds to keep node list and nodes found by define_urls
+    NODES_TTL = 30
 
     def __init__(self, node: str = 'tickdb3', env: str = 'prod'):
         self.node = node
@@ -1246,6 +2029,8 @@ class TickDB3:
         self.domain = 'zorg.sh'
         self.url = f'http://{self.node}.{self.env}.{self.domain}'
 
+        # after the last retry the 5xx response itself is returned, so callers
+        # still raise RuntimeError with the server message instead of RetryError
         retries = Retry(
             total=5,
             backoff_factor=0.1,
@@ -1254,14 +2039,27 @@ class TickDB3:
                 502,
                 503,
                 504
-            ]
+            ],
+            raise_on_status=False
         )
 
         self.import_api_session = requests.session()
         self.quote_api_session = requests.session()
-        self.quote_api_session.mount('http://', HTTPAdapter(max_retries=retries))
         self.crossrate_api_session = requests.session()
-        self.crossrate_api_session.mount('http://', HTTPAdapter(max_retries=retries))
+        for session in (
+                self.import_api_session,
+                self.quote_api_session,
+                self.crossrate_api_session
+            ):
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=retries)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        # (node type, role) -> (expiration time, nodes), see define_urls
+        self._nodes_cache = {}
+        # (expiration time, nodes), see get_nodes
+        self._nodes_list = (0, [])
+        # (node, env, domain) -> url, see quote_at
+        self._quote_at_urls = {}
         self.seq = None
 
     def __repr__(self):
@@ -1290,29 +2088,22 @@ class TickDB3:
         url = self.api_url('quote', data, payload=f"export/symbols/{urlencode(symbol, safe='')}/")
         if since:
             since = since.replace(tzinfo=pytz.UTC)
-            params['from'] = int(since.timestamp() * 1000)
+            params['from'] = _to_ms(since)
         if till:
             till = till.replace(tzinfo=pytz.UTC)
-            params['to'] = int(till.timestamp() * 1000)
+            params['to'] = _to_ms(till)
         if limit:
             params['limit'] = limit
-        logging.debug('Parameters are {}'.format(params))
+        logging.debug('Parameters are %s', params)
         response = self.quote_api_session.get(
             url=url,
             params=params,
-            headers={
-                'accept-encoding': 'gzip',
-                'accept': 'application/x-ndjson'
-            },
+            headers={'accept': 'application/x-ndjson'},
             stream=True
         )
 
         if response.ok:
-            for line in response.iter_lines():
-                try:
-                    yield json.loads(line.decode(), object_hook=json_decoder)
-                except ValueError:
-                    pass
+            yield from _iter_ndjson(response)
         else:
             raise RuntimeError(
                 f'{response.status_code} ({response.reason}): {response.text}' + '\n'
@@ -1338,12 +2129,6 @@ class TickDB3:
         elif api not in ["quote", "import"]:
             logging.error(f'wrong API name, should be "quote" or "import"')
             return ''
-        port = {
-            'trades': ':8181',
-            'quotes': ':8181',
-            'option_data': ':8181',
-            'prices': ':8182'
-        }
         api_query = {
             'import': [
                 '/v1/import/',
@@ -1359,15 +2144,35 @@ class TickDB3:
         if api == 'quote' and node == 'tickdb3':
             url = base_url + ''.join(api_query[api])
         else:
-            url = base_url + port[data_type.data] + ''.join(api_query[api])
+            url = base_url + self.PORTS[data_type.data] + ''.join(api_query[api])
         return url
 
+    def __find_nodes(self, node_type: str, role: str):
+        """
+        returns nodes of specified type that have specified role
+        """
+        all_nodes = self.get_nodes()
+        role_request = '/web/v1/server_info'
+        candidates = [url.replace(node_type, '') for url in all_nodes if node_type in url]
+
+        def node_role(node):
+            # dead node should fail fast instead of hanging the whole lookup
+            return _loads(self.quote_api_session.get(
+                url=node+role_request,
+                headers={'accept': 'application/json'},
+                timeout=(2, None)
+            )).get('role')
+
+        # role checks are independent, ask all nodes at once
+        with ThreadPoolExecutor(max_workers=min(16, len(candidates)) or 1) as executor:
+            roles = list(executor.map(node_role, candidates))
+        return [node for node, found in zip(candidates, roles) if found == role]
+
     def define_urls(self, data_type: Union[MarketData, MarketDepth], symbol: str):
         """
         returns urls for post to tickdb etc
         """
-        logging.debug(f'Searching nodes for agregate type {data_type.data}...')
-        all_nodes = self.get_nodes()
+        logging.debug('Searching nodes for agregate type %s...', data_type.data)
         if data_type.data in ['quotes', 'trades'] and data_type.interval is None:
             node_type = 'tickdb_server@'
             role = 'server/ticks'
@@ -1385,27 +2190,34 @@ class TickDB3:
             role = 'symbol_prices'
         else:
             return []
-        role_request = '/web/v1/server_info'
-        needed_nodes = [
-            url.replace(node_type, '') for url
-            in all_nodes
-            if node_type in url
-            and self.quote_api_session.get(
-                url=url.replace(node_type, '')+role_request,
-                headers={'accept': 'application/json'}
-            ).json().get('role') == role
-        ]
+        cached = self._nodes_cache.get((node_type, role))
+        if cached and cached[0] > monotonic():
+            needed_nodes = cached[1]
+        else:
+            needed_nodes = self.__find_nodes(node_type, role)
+            # empty answer may be a failed lookup, don't keep it
+            if needed_nodes:
+                self._nodes_cache[(node_type, role)] = (monotonic() + self.NODES_TTL, needed_nodes)
+        # same as api_url('import', ...), only node differs
+        suffix = (
+            f"{self.PORTS[data_type.data]}/v1/import/"
+            f"symbols/{urlencode(symbol, safe='')}/{data_type.import_api}"
+        )
         urls = [
-            self.api_url('import', data_type, node=node, payload=f"symbols/{urlencode(symbol, safe='')}/")
+            f"http://{node.replace('http://', '').split('.')[0]}.{self.env}.{self.domain}{suffix}"
             for node in needed_nodes
         ]
 
-        logging.debug(f"{len(urls)} urls found:" + '\n' + '\n'.join(urls))
+        logging.debug('%s urls found:\n%s', len(urls), '\n'.join(urls))
         return urls
 
     def __post(self, symbol: str, data_type: Union[MarketData, MarketDepth], data: list, **kwargs):
         """
-        Internal method, posts data to QDictator without any transformations
+        Internal method, posts data to QDictator without any transformations.
+        First replica is written and checked alone, so a CommitLock or a bad
+        answer there stops the import. The rest are written in parallel and
+        checked afterwards: error of one of them is raised only when all of
+        them are written
         :param symbol: string with SymbolID
         :param data_type: string that identifies type of market data for QRing
         :param data: list of dictionaries representing trades, quotes, etc.
@@ -1415,12 +2227,6 @@ class TickDB3:
         :raises: RuntimeError in case of wrong server answer
         """
 
-        def chunk_input():
-            for item in data:
-                encoded_item = json.dumps(item, default=json_encoder)
-                yield '{}\n'.format(encoded_item).encode()
-            return
-
         if self.node == 'tickdb3':
             urls = self.define_urls(data_type=data_type, symbol=symbol)
         else:
@@ -1431,23 +2237,44 @@ class TickDB3:
         logging.debug(urls)
 
         if data_type.data == 'price':
-            kwargs.update({'resetPrice': 'true'})
+            kwargs['resetPrice'] = 'true'
 
         try:
-            logging.debug(f'Importing {len(data)} items to TickDB3')
+            logging.debug('Importing %s items to TickDB3', len(data))
         except TypeError:
             logging.debug('Importing unknown number of items to TickDB3')
 
-        logging.debug(f'Parameters are {kwargs}')
+        logging.debug('Parameters are %s', kwargs)
+
+        # serialized once and shared by all replicas
+        body = b''.join(map(_dumps_line, data))
+        query = '&'.join([f'{key}={value}' for key, value in kwargs.items()])
 
-        for url in urls:
-            logging.debug(f'Posting to {url}')
-            response = self.import_api_session.post(
-                f"{url}?{'&'.join([f'{key}={value}' for key, value in kwargs.items()])}",
-                data=chunk_input(),
+        def post(url):
+            logging.debug('Posting to %s', url)
+            return self.import_api_session.post(
+                f'{url}?{query}',
+                data=body,
                 headers={'Content-Type': 'application/x-ndjson'}
             )
-            logging.debug(f'Response is {response}')
+
+        if not urls:
+            return
+        try:
+            response = post(urls[0])
+            logging.debug('Response is %s', response)
+            self.__check_response(response)
+            if len(urls) > 1:
+                with ThreadPoolExecutor(max_workers=min(16, len(urls) - 1)) as executor:
+                    responses = list(executor.map(post, urls[1:]))
+            else:
+                responses = []
+        except requests.ConnectionError:
+            # node may be gone, look the nodes up again next time
+            self._nodes_cache.clear()
+            raise
+        for response in responses:
+            logging.debug('Response is %s', response)
             self.__check_response(response)
 
     def __check_response(self, response: requests.Response):
@@ -1464,7 +2291,7 @@ class TickDB3:
             return None
         else:
             try:
-                parsed_response = response.json()
+                parsed_response = _loads(response)
                 status = parsed_response.get('type')
                 if status == 'ok':
                     seq = parsed_response.get('seq')
@@ -1517,11 +2344,12 @@ class TickDB3:
                 count += 1
         if count:
             logging.debug(
-                f'Don\'t try to break TickDB3 import with {count} wrong objects, '
-                'use objects with iDictator interface'
+                'Don\'t try to break TickDB3 import with %s wrong objects, '
+                'use objects with iDictator interface',
+                count
             )
         for data_group, section in result.items():
-            logging.debug(f'Going to post {data_group} for {symbol}')
+            logging.debug('Going to post %s for %s', data_group, symbol)
             self.__post(symbol, section['md'], section['payload'], **kwargs)
 
     def get(
@@ -1531,6 +2359,7 @@ class TickDB3:
             till: Union[str, datetime] = None,
             limit: int = None,
             cls=list,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1541,26 +2370,32 @@ class TickDB3:
         :param since: datetime of earliest aggregate
         :param till: datetime of latest aggregate
         :param limit: quantity of aggregates
-        :param cls: class of list-like storage for received data
+        :param cls: class of list-like storage for received data,
+         if None lazy generator is returned
+        :param raw: store dicts received from QRing instead of objects
         :param kwargs: additional GET parameters
-        :return: list of aggregates
+        :return: list of aggregates or generator if cls is None
         """
         # TODO there should be another way
         if isinstance(since, str):
-            since = parser.parse(since)
+            since = _parse_ts(since)
         if isinstance(till, str):
-            till = parser.parse(till)
+            till = _parse_ts(till)
+        aggregates = chain(
+            self.get_quotes(symbol, since, till, limit, raw=raw, **kwargs),
+            self.get_qcandles(symbol, None, since, till, limit, raw=raw, **kwargs),
+            self.get_trades(symbol, since, till, limit, raw=raw, **kwargs),
+            self.get_tcandles(symbol, None, since, till, limit, raw=raw, **kwargs)
+        )
+        if cls is None:
+            return aggregates
         result = cls()
-        result.extend(self.get_quotes(symbol, since, till, limit, **kwargs))
-        result.extend(self.get_qcandles(symbol, None, since, till, limit, **kwargs))
-        result.extend(self.get_trades(symbol, since, till, limit, **kwargs))
-        result.extend(self.get_tcandles(symbol, None, since, till, limit, **kwargs))
+        result.extend(aggregates)
         return result
     
     def marketdata_to_json(self, data: list[Union[MarketData, MarketDepth]], file_name: str):
-        result = []
-        for d in data:
-            result.append(d.dictator_dict)
+        # raw dicts (see raw parameter of get) are dumped as they are
+        result = [d if isinstance(d, dict) else d.dictator_dict for d in data]
         with open(file_name, 'w') as f:
             json.dump(result, f, indent=2, default=json_encoder)
 
@@ -1591,15 +2426,16 @@ class TickDB3:
         else:
             positions = [None]
         if isinstance(since, str):
-            since = parser.parse(since)
+            since = _parse_ts(since)
         if isinstance(till, str):
-            till = parser.parse(till)
-        log_message = f"Start getting {md_type} {'candles' if candles else ''}"
-        if intervals[0]:
-            log_message += f'with following intervals: {intervals}'
-        if positions[0]:
-            log_message += '\n' + f'for those positions: {positions}'
-        logging.debug(log_message)
+            till = _parse_ts(till)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            log_message = f"Start getting {md_type} {'candles' if candles else ''}"
+            if intervals[0]:
+                log_message += f'with following intervals: {intervals}'
+            if positions[0]:
+                log_message += '\n' + f'for those positions: {positions}'
+            logging.debug(log_message)
         tdb_data = []
         for i in intervals:
             for p in positions:
@@ -1625,6 +2461,7 @@ class TickDB3:
             till: Union[str, datetime] = None,
             limit: int = None,
             validate: bool = False,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1635,6 +2472,7 @@ class TickDB3:
         :param till: datetime of latest candle
         :param limit: quantity of candles
         :param validate: verify candles received from QRing
+        :param raw: yield dicts received from QRing instead of Candle objects
         :param kwargs: additional GET parameters
         :return: generator of Candle objects
         :raises: RuntimeError in case of non 200 response from server
@@ -1651,20 +2489,18 @@ class TickDB3:
             **kwargs
         )
         for c, marketdata in candles:
+            if raw:
+                yield from c
+                continue
+            data_type, interval = marketdata.data, marketdata.interval
             for candle in c:
-                semi_result = Candle(
-                    marketdata.data,
-                    marketdata.interval,
-                    timestamp=candle['time'],
-                    open_price=candle['open_price'],
-                    close_price=candle['close_price'],
-                    max_price=candle['max_price'],
-                    min_price=candle['min_price'],
+                yield Candle(
+                    data_type,
+                    interval,
+                    *_CANDLE_FIELDS(candle),
+                    volume=candle.get('volume'),
                     validate=validate
                 )
-                if candle.get('volume') is not None:
-                    semi_result.volume = Decimal(candle['volume'])
-                yield semi_result
 
     def get_qcandles(
             self,
@@ -1674,6 +2510,7 @@ class TickDB3:
             till: Union[str, datetime] = None,
             limit: int = None,
             validate: bool = False,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1684,6 +2521,7 @@ class TickDB3:
         :param till: datetime of latest candle
         :param limit: quantity of candles
         :param validate: verify candles received from QRing
+        :param raw: yield dicts received from QRing instead of Candle objects
         :param kwargs: additional GET parameters
         :return: generator of Candle objects
         :raises: RuntimeError in case of non 200 response from server
@@ -1700,16 +2538,16 @@ class TickDB3:
             **kwargs
         )
         for c, marketdata in candles:
+            if raw:
+                yield from c
+                continue
+            data_type, interval = marketdata.data, marketdata.interval
             for candle in c:
                 try:
                     semi_result = Candle(
-                        marketdata.data,
-                        marketdata.interval,
-                        timestamp=candle['time'],
-                        open_price=candle['open_price'],
-                        close_price=candle['close_price'],
-                        max_price=candle['max_price'],
-                        min_price=candle['min_price'],
+                        data_type,
+                        interval,
+                        *_CANDLE_FIELDS(candle),
                         validate=validate
                     )
                 except KeyError:
@@ -1725,6 +2563,7 @@ class TickDB3:
             since: Union[str, datetime] = None,
             till: Union[str, datetime] = None,
             limit: int = None,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1733,6 +2572,7 @@ class TickDB3:
         :param since: datetime of earliest candle
         :param till: datetime of latest candle
         :param limit: quantity of trades
+        :param raw: yield dicts received from QRing instead of Trade objects
         :param kwargs: additional GET parameters
         :return: generator of Trade objects
         :raises: RuntimeError in case of non 200 response from server
@@ -1747,6 +2587,9 @@ class TickDB3:
             **kwargs
         )
         for t, marketdata in trades:
+            if raw:
+                yield from t
+                continue
             for trade in t:
                 yield Trade(
                     trade['time'],
@@ -1760,6 +2603,7 @@ class TickDB3:
             since: Union[str, datetime] = None,
             till: Union[str, datetime] = None,
             limit: int = None,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1768,6 +2612,7 @@ class TickDB3:
         :param since: datetime of earliest candle
         :param till: datetime of latest candle
         :param limit: quantity of quotes
+        :param raw: yield dicts received from QRing instead of MarketDepth objects
         :param kwargs: additional GET parameters
         :return: generator of MarketDepth objects
         """
@@ -1781,6 +2626,9 @@ class TickDB3:
             **kwargs
         )
         for q, marketdata in quotes:
+            if raw:
+                yield from q
+                continue
             for item in q:
                 result = MarketDepth.from_dict(item)
                 if result:
@@ -1797,16 +2645,15 @@ class TickDB3:
         url = f"{self.url}/crossrate_api/v1/snapshot"
         params = {}
         if ts:
-            params['timestamp'] = int(ts.timestamp()) * 1000
-        logging.debug('Parameters are {}'.format(params))
+            params['timestamp'] = _to_ms(ts)
+        logging.debug('Parameters are %s', params)
         response = self.crossrate_api_session.get(
             url=url,
-            params=params,
-            headers={'accept-encoding': 'gzip'}
+            params=params
         )
 
         if response.ok:
-            return response.json()
+            return _loads(response)
         else:
             raise RuntimeError(
                 f'{response.status_code} ({response.reason}): {response.text}' + '\n'
@@ -1824,16 +2671,15 @@ class TickDB3:
         url = f"{self.url}/crossrate_api/v1/crossrate"
         params = {'from': asset1, 'to': asset2}
         if ts:
-            params['timestamp'] = int(ts.timestamp()) * 1000
-        logging.debug('Parameters are {}'.format(params))
+            params['timestamp'] = _to_ms(ts)
+        logging.debug('Parameters are %s', params)
         response = self.crossrate_api_session.get(
             url=url,
-            params=params,
-            headers={'accept-encoding': 'gzip'}
+            params=params
         )
 
         if response.ok:
-            return response.json()
+            return _loads(response)
         else:
             raise RuntimeError(
                 f'{response.status_code} ({response.reason}): {response.text}' +'\n'
@@ -1853,33 +2699,35 @@ class TickDB3:
          MarketDepth objects as values
         """
         if isinstance(timestamp, str):
-            timestamp = parser.parse(timestamp)
-        url = '/'.join(self.api_url(
-            'quote',
-            data_type=MarketData('quotes'),
-            payload='history/quote_at/'
-        ).split('/')[:-1])
+            timestamp = _parse_ts(timestamp)
+        url_key = (self.node, self.env, self.domain)
+        url = self._quote_at_urls.get(url_key)
+        if url is None:
+            url = self._quote_at_urls[url_key] = '/'.join(self.api_url(
+                'quote',
+                data_type=MarketData('quotes'),
+                payload='history/quote_at/'
+            ).split('/')[:-1])
         payload = [('symbol_id', s) for s in symbols]
-        payload.append(('timestamp', int(timestamp.timestamp() * 1000)))
-        logging.debug('Payload is {}'.format(payload))
+        payload.append(('timestamp', _to_ms(timestamp)))
+        logging.debug('Payload is %s', payload)
 
-        response = requests.post(
+        response = self.quote_api_session.post(
             url=url,
-            data=payload,
-            headers={'accept-encoding': 'gzip'}
+            data=urlencode_form(payload).encode(),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
         )
 
-        result = dict()
         if response.ok:
-            data = response.json(object_hook=json_decoder)
+            data = _loads(response, decode=True)
             for item in data:
                 if item.get('error'):
-                    logging.debug('Error for {}: {}'.format(item['symbol_id'],
-                                                            item['error']))
-                    continue
-                result[item['symbol_id']] = MarketDepth.from_dict(item)
-
-            return result
+                    logging.debug('Error for %s: %s', item['symbol_id'], item['error'])
+            return {
+                item['symbol_id']: MarketDepth.from_dict(item)
+                for item in data
+                if not item.get('error')
+            }
         else:
             raise RuntimeError(
                 f'{response.status_code} ({response.reason}): {response.text}'
@@ -1911,12 +2759,12 @@ class TickDB3:
             limit=limit,
             **kwargs
         )
-        for od in option_data:
+        for od, marketdata in option_data:
             for item in od:
                 try:
                     result = OptionData.from_dict(item)
                 except ValueError as e:
-                    logging.error('{} ({})'.format(e, item))
+                    logging.error('%s (%s)', e, item)
                     continue
 
                 yield result
@@ -1930,6 +2778,7 @@ class TickDB3:
             till: Union[str, datetime] = None,
             limit: int = None,
             validate: bool = False,
+            raw: bool = False,
             **kwargs
         ):
         """
@@ -1941,6 +2790,7 @@ class TickDB3:
         :param till: datetime of latest candle
         :param limit: quantity of candles
         :param validate: verify candles received from QRing
+        :param raw: yield dicts received from QRing instead of OptionDataCandle objects
         :param kwargs: additional GET parameters
         :return: generator of OptionDataCandle objects
         :raises: RuntimeError in case of non 200 response from server
@@ -1959,18 +2809,18 @@ class TickDB3:
             **kwargs
         )
         for c, marketdata in candles:
+            if raw:
+                yield from c
+                continue
+            interval, position = marketdata.interval, marketdata.position
             for candle in c:
                 try:
                     semi_result = OptionDataCandle(
                         'option_data',
-                        marketdata.interval,
-                        marketdata.position,
-                        timestamp=candle['time'],
-                        open_price=candle['open_price'],
-                        close_price=candle['close_price'],
-                        max_price=candle['max_price'],
-                        min_price=candle['min_price'],
-                        validate=validate
+                        interval,
+                        position,
+                        *_CANDLE_FIELDS(candle),
+                        validate
                     )
                 except KeyError:
                     logging.warning(
@@ -2030,33 +2880,44 @@ class TickDB3:
         :raises: RuntimeError in case of wrong server answer
         """
         if isinstance(timestamp, str):
-            timestamp = parser.parse(timestamp)
+            timestamp = _parse_ts(timestamp)
         
         urls = urls if urls else self.define_urls(data_type=data_type, symbol=symbol)
 
         logging.debug(urls)
 
         payload = {
-            'timestamp': int(timestamp.timestamp() * 1000) if timestamp else data_type.timestamp
+            'timestamp': _to_ms(timestamp) if timestamp else data_type.timestamp
         }
-        logging.debug('Payload is {}'.format(payload))
-        for url in urls:
-            response = requests.delete(
+        logging.debug('Payload is %s', payload)
+
+        def delete(url):
+            return self.import_api_session.delete(
                 url=url,
                 params=payload,
                 headers={'Content-Type': 'application/json'}
             )
+
+        # deletes are independent, responses are checked in order afterwards
+        with ThreadPoolExecutor(max_workers=min(16, len(urls)) or 1) as executor:
+            responses = list(executor.map(delete, urls))
+        for response in responses:
             self.__check_response(response)
 
-    def get_nodes(self):
+    def get_nodes(self, cache: bool = False):
         """
         returns list of registered nodes
+        :param cache: reuse list received less than NODES_TTL seconds ago
         :return:
         """
+        if cache and self._nodes_list[0] > monotonic():
+            return list(self._nodes_list[1])
         url = f'{self.url}/quote_api/v1/nodes'
         response = self.quote_api_session.get(url)
         if response.ok:
-            return response.json()
+            nodes = _loads(response)
+            self._nodes_list = (monotonic() + self.NODES_TTL, nodes)
+            return list(nodes)
         else:
             logging.warning(response.text)
             return list()
@@ -2065,7 +2926,7 @@ class TickDB3:
         url = f'{self.url}/quote_api/v1/aggregates'
         response = self.quote_api_session.get(url)
         if response.ok:
-            return response.json()
+            return _loads(response)
         else:
             logging.warning(response.text)
             return list()
@@ -2082,24 +2943,22 @@ class TickDB3:
 
         if response.ok:
             data = dict()
-            for item in response.json():
-                if item['type'] not in data:
-                    data.update({item['type']: []})
-                data[item['type']].append(item['duration'])
+            for item in _loads(response):
+                data.setdefault(item['type'], []).append(item['duration'])
             return data
 
         logging.warning(response.text)
         return dict()
 
     def get_all_aggregates_type(self) -> dict:
-        nodes = self.get_nodes()
+        nodes = self.get_nodes(cache=True)
+        # nodes are independent, ask all of them at once
+        with ThreadPoolExecutor(max_workers=min(32, len(nodes)) or 1) as executor:
+            node_aggregates = list(executor.map(self.get_node_aggregates, nodes))
         aggregates = dict()
-        for node in nodes:
-            temp = self.get_node_aggregates(node)
-            for aggregate in temp:
-                if aggregate not in aggregates:
-                    aggregates.update({aggregate: set()})
-                aggregates[aggregate].update(temp[aggregate])
+        for temp in node_aggregates:
+            for aggregate, durations in temp.items():
+                aggregates.setdefault(aggregate, set()).update(durations)
         return aggregates
 
     def search_nodes(self, type_='quote_v1') -> list:
@@ -2108,15 +2967,15 @@ class TickDB3:
         :param type_: data type
         :return: list of dictionary [{node, type, env, domain, port}]
         """
-        nodes = self.get_nodes()
-        node_re = re.compile(r'(http://)(?P<type>\w+)@(?P<node>\w+)\.(?P<env>\w+)\.(?P<domain>.\w+.\w+):(?P<port>\d+)')
+        nodes = self.get_nodes(cache=True)
+        with ThreadPoolExecutor(max_workers=min(32, len(nodes)) or 1) as executor:
+            node_aggregates = list(executor.map(self.get_node_aggregates, nodes))
         result = list()
-        for node in nodes:
-            aggregates = self.get_node_aggregates(node)
+        for node, aggregates in zip(nodes, node_aggregates):
             if type_ in aggregates:
-                data = node_re.match(node)
+                data = regex['node'].match(node)
                 if data:
-                    result.append({key: data.group(key) for key in ['node', 'type', 'env', 'domain', 'port']})
+                    result.append(data.groupdict())
         return result
 
 
@@ -2127,11 +2986,17 @@ class TickDB3:
                 return f"http://{node}"
             else:
                 return node.split('.')[0]
-        nodelist = requests.get(f"http://tickdb3.{env}.zorg.sh/quote_api/v1/nodes").json()
+        nodelist = _loads(_SESSION.get(f"http://tickdb3.{env}.zorg.sh/quote_api/v1/nodes"))
+        hosts = [item.split('@')[-1] for item in nodelist]
+
+        def node_aggregates(host):
+            return _loads(_SESSION.get(f"http://{host}/quote_api/v1/aggregates"))
+
+        with ThreadPoolExecutor(max_workers=min(32, len(hosts)) or 1) as executor:
+            host_aggregates = list(executor.map(node_aggregates, hosts))
         output = {}
-        for item in nodelist:
-            node = item.split('@')[-1]
-            for k in requests.get(f"http://{node}/quote_api/v1/aggregates").json():
+        for node, aggregates in zip(hosts, host_aggregates):
+            for k in aggregates:
                 t = k['type']
                 if t in output:
                     output[t].add(make_node())
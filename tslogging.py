@@ -6,6 +6,16 @@ Library to standardise logging initialisation and calls
 
 import logging
 import argparse
+import os
+
+
+_LEVEL_MAP = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL
+}
 
 
 class TsLogging:
@@ -14,6 +24,12 @@ class TsLogging:
     default_logformat = '%(asctime)s: pid %(process)s: %(levelname)s: %(name)s.%(funcName)s: %(message)s'
     default_loglevel = 'warning'
 
+    debug = staticmethod(logging.debug)
+    info = staticmethod(logging.info)
+    warning = staticmethod(logging.warning)
+    error = staticmethod(logging.error)
+    critical = staticmethod(logging.critical)
+
     def __init__(self, args=None, loglevel=None, logformat=None, logfile=None):
         """
         main init method
@@ -27,12 +43,39 @@ class TsLogging:
                 loglevel = self.default_loglevel
             if logformat is None:
                 logformat = self.default_logformat
-            logging.basicConfig(filename=logfile, format=logformat, level=loglevel.upper(), force=True) #3.8+
         else:
-            logging.basicConfig(filename=args.log, format=args.log_format, level=args.log_level.upper(), force=True) #3.8+
+            logfile, logformat, loglevel = args.log, args.log_format, args.log_level
+        level = _LEVEL_MAP.get(loglevel.lower())
+        if level is None:
+            # other names basicConfig accepts: WARN, FATAL, NOTSET
+            level = logging._nameToLevel.get(loglevel.upper())
+        if level is None:
+            raise ValueError(f'Unknown level: {loglevel!r}')
 
-        for level in self.loglevels:
-            setattr(self, level, getattr(logging, level))
+        # rebuilding handlers is only needed when file or format changes
+        if self._has_handler(logfile, logformat):
+            logging.getLogger().setLevel(level)
+        else:
+            logging.basicConfig(filename=logfile, format=logformat, level=level, force=True) #3.8+
+
+    @staticmethod
+    def _has_handler(logfile, logformat) -> bool:
+        """
+        checks whether root logger has exactly the handler basicConfig would set up
+        :param logfile: path to logfile or None for stderr
+        :param logformat: logformat of the handler
+        """
+        handlers = logging.getLogger().handlers
+        if len(handlers) != 1 or handlers[0].formatter is None:
+            return False
+        handler = handlers[0]
+        if logfile:
+            if not (isinstance(handler, logging.FileHandler)
+                    and handler.baseFilename == os.path.abspath(logfile)):
+                return False
+        elif type(handler) is not logging.StreamHandler:
+            return False
+        return handler.formatter._fmt == logformat
 
     @classmethod
     def add_args(cls, parser: argparse.ArgumentParser, def_level=None):